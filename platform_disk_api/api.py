@@ -60,6 +60,10 @@ from .service import Disk, DiskNotFound, Service
 
 logger = logging.getLogger(__name__)
 
+# Schema instantiation is costly, so instances used for dumping are shared
+_disk_schema = DiskSchema()
+_disks_schema = DiskSchema(many=True)
+
 
 class ApiHandler:
     def register(self, app: aiohttp.web.Application) -> list[AbstractRoute]:
@@ -238,7 +242,7 @@ class DiskApiHandler:
                 status=HTTPForbidden.status_code,
             )
         disk = await self._service.create_disk(disk_request, user.name)
-        resp_payload = DiskSchema().dump(disk)
+        resp_payload = _disk_schema.dump(disk)
         return json_response(resp_payload, status=HTTPCreated.status_code)
 
     def _check_disk_read_perm(self, disk: Disk, tree: ClientSubTreeViewRoot) -> bool:
@@ -267,7 +271,7 @@ class DiskApiHandler:
     async def handle_get_disk(self, request: Request) -> Response:
         disk = await self._resolve_disk(request)
         await check_permissions(request, [self._get_disk_read_perm(disk)])
-        resp_payload = DiskSchema().dump(disk)
+        resp_payload = _disk_schema.dump(disk)
         return json_response(resp_payload, status=HTTPOk.status_code)
 
     @docs(tags=["disks"], summary="List all users Disk objects")
@@ -286,7 +290,7 @@ class DiskApiHandler:
             )
             if self._check_disk_read_perm(disk, tree)
         ]
-        resp_payload = DiskSchema(many=True).dump(disks)
+        resp_payload = _disks_schema.dump(disks)
         return json_response(resp_payload, status=HTTPOk.status_code)
 
     @docs(
@@ -431,7 +435,9 @@ async def create_app(config: Config) -> aiohttp.web.Application:
 
             logger.info("Initializing Service")
             app["disk_app"]["service"] = Service(
-                kube_client, config.disk.k8s_storage_class
+                kube_client,
+                config.disk.k8s_storage_class,
+                legacy_pvc_backfill=config.disk.legacy_pvc_backfill,
             )
 
             yield
@@ -50,6 +50,9 @@ class KubeConfig:
 class DiskConfig:
     storage_limit_per_user: int
     k8s_storage_class: str = ""  # default k8s storage class
+    # Patch pvcs created by old versions on read, can be disabled
+    # once all of them are migrated
+    legacy_pvc_backfill: bool = True
 
 
 @dataclass(frozen=True)
@@ -87,3 +90,6 @@ class DiskUsageWatcherConfig:
     kube: KubeConfig
     zipkin: Optional[ZipkinConfig] = None
     sentry: Optional[SentryConfig] = None
+    # Watch only pods matching the selector, e.g. if pods with pvcs
+    # are labelled on admission
+    pod_label_selector: Optional[str] = None
@@ -54,6 +54,7 @@ class EnvironConfigFactory:
             kube=self.create_kube(),
             zipkin=self.create_zipkin("platform-disks-usage-watcher"),
             sentry=self.create_sentry("platform-disks-usage-watcher"),
+            pod_label_selector=self._environ.get("NP_DISK_API_POD_LABEL_SELECTOR"),
         )
 
     def _create_server(self) -> ServerConfig:
@@ -112,6 +113,10 @@ class EnvironConfigFactory:
             storage_limit_per_user=int(
                 self._environ["NP_DISK_API_STORAGE_LIMIT_PER_USER"]
             ),
+            legacy_pvc_backfill=self._environ.get(
+                "NP_DISK_API_LEGACY_PVC_BACKFILL", "true"
+            )
+            == "true",
         )
 
     def create_cors(self) -> CORSConfig:
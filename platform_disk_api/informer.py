@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+from typing import Optional
+
+from .kube_client import (
+    KubeClient,
+    KubeClientExpired,
+    KubeClientUnauthorized,
+    PersistentVolumeClaimRead,
+    PersistentVolumeClaimWatchEvent,
+    PodRead,
+    PodWatchEvent,
+    ResourceGone,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PVCInformer:
+    """Keeps an in-memory copy of pvcs up to date.
+
+    Pvcs are listed once and then kept in sync by watching for changes,
+    so reading them does not require a request to the apiserver.
+    """
+
+    def __init__(
+        self,
+        kube_client: KubeClient,
+        label_selector: Optional[str] = None,
+        min_retry_interval_s: float = 1,
+        max_retry_interval_s: float = 30,
+    ) -> None:
+        self._kube_client = kube_client
+        self._label_selector = label_selector
+        self._min_retry_interval_s = min_retry_interval_s
+        self._max_retry_interval_s = max_retry_interval_s
+        self._pvcs: dict[str, PersistentVolumeClaimRead] = {}
+        self._synced = asyncio.Event()
+        self._revision = 0
+
+    @property
+    def pvcs(self) -> list[PersistentVolumeClaimRead]:
+        return list(self._pvcs.values())
+
+    @property
+    def revision(self) -> int:
+        """Incremented on every change of the cached pvcs."""
+        return self._revision
+
+    def get_pvc(self, pvc_name: str) -> Optional[PersistentVolumeClaimRead]:
+        return self._pvcs.get(pvc_name)
+
+    async def wait_synced(self) -> None:
+        await self._synced.wait()
+
+    async def run(self) -> None:
+        resource_version: Optional[str] = None
+        retry_interval_s = self._min_retry_interval_s
+        while True:
+            try:
+                if resource_version is None:
+                    list_result = await self._kube_client.list_pvc_result(
+                        self._label_selector
+                    )
+                    self._pvcs = {pvc.name: pvc for pvc in list_result.pvcs}
+                    self._revision += 1
+                    resource_version = list_result.resource_version
+                    self._synced.set()
+                    retry_interval_s = self._min_retry_interval_s
+                async for event in self._kube_client.watch_pvc(
+                    resource_version, self._label_selector
+                ):
+                    resource_version = event.resource_version
+                    self._handle_event(event)
+                    retry_interval_s = self._min_retry_interval_s
+                continue
+            except asyncio.CancelledError:
+                raise
+            except ResourceGone:
+                resource_version = None
+                continue
+            except KubeClientUnauthorized:
+                logger.info("Kube client unauthorized")
+            except KubeClientExpired:
+                logger.info("Kube client expired")
+                resource_version = None
+            except Exception:
+                logger.exception("Failed to sync pvcs")
+            # Do not hammer the apiserver while it keeps failing
+            await asyncio.sleep(retry_interval_s)
+            retry_interval_s = min(retry_interval_s * 2, self._max_retry_interval_s)
+
+    def _handle_event(self, event: PersistentVolumeClaimWatchEvent) -> None:
+        if event.pvc is None:
+            return
+        if event.type == PersistentVolumeClaimWatchEvent.Type.DELETED:
+            self._pvcs.pop(event.pvc.name, None)
+        else:
+            self._pvcs[event.pvc.name] = event.pvc
+        self._revision += 1
+
+
+class PodPVCIndex:
+    """Keeps track of pods using pvcs and nodes they run on.
+
+    It is fed by the pod list and watch events of the disk usage watcher.
+    """
+
+    def __init__(self) -> None:
+        self._pods: dict[str, PodRead] = {}
+        self._synced = False
+
+    @property
+    def node_names(self) -> Optional[set[str]]:
+        """Names of nodes running pods with pvcs, None until the first sync."""
+        if not self._synced:
+            return None
+        return {pod.node_name for pod in self._pods.values() if pod.node_name}
+
+    def reset(self, pods: Iterable[PodRead]) -> None:
+        self._pods = {pod.name: pod for pod in pods if pod.pvc_in_use}
+        self._synced = True
+
+    def handle_event(self, event: PodWatchEvent) -> None:
+        if event.type == PodWatchEvent.Type.BOOKMARK:
+            return
+        if event.type == PodWatchEvent.Type.DELETED or not event.pod.pvc_in_use:
+            self._pods.pop(event.pod.name, None)
+        else:
+            self._pods[event.pod.name] = event.pod
@@ -2,15 +2,17 @@ import asyncio
 import json
 import logging
 import ssl
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Collection
 from contextlib import suppress
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, NamedTuple, Optional, Union
 from urllib.parse import urlsplit
 
 import aiohttp
+import orjson
 from aiohttp import ClientTimeout
 from yarl import URL
 
@@ -51,30 +53,39 @@ class KubeClientExpired(KubeClientException):
     pass
 
 
-def _storage_str_to_int(storage: str) -> int:
-    # More about this format:
-    # https://github.com/kubernetes/kubernetes/blob/6b963ed9c841619d511d2830719b6100d6ab1431/staging/src/k8s.io/apimachinery/pkg/api/resource/quantity.go#L30
-    suffix_to_factor = {
-        "E": 10**18,
-        "P": 10**15,
-        "T": 10**12,
-        "G": 10**9,
-        "M": 10**6,
-        "k": 10**3,
-        "Ei": 1024**6,
-        "Pi": 1024**5,
-        "Ti": 1024**4,
-        "Gi": 1024**3,
-        "Mi": 1024**2,
-        "Ki": 1024,
-    }
-    try:
-        return int(float(storage))
-    except ValueError:
-        for suffix, factor in suffix_to_factor.items():
-            if storage.endswith(suffix):
-                return factor * int(storage[: -len(suffix)])
-        raise
+# More about this format:
+# https://github.com/kubernetes/kubernetes/blob/6b963ed9c841619d511d2830719b6100d6ab1431/staging/src/k8s.io/apimachinery/pkg/api/resource/quantity.go#L30
+_BINARY_SUFFIX_TO_FACTOR = {
+    "Ei": 1024**6,
+    "Pi": 1024**5,
+    "Ti": 1024**4,
+    "Gi": 1024**3,
+    "Mi": 1024**2,
+    "Ki": 1024,
+}
+_DECIMAL_SUFFIX_TO_FACTOR = {
+    "E": 10**18,
+    "P": 10**15,
+    "T": 10**12,
+    "G": 10**9,
+    "M": 10**6,
+    "k": 10**3,
+}
+
+
+# Only a handful of distinct sizes are used across all pvcs
+@lru_cache(maxsize=512)
+def _storage_str_to_int(storage: Union[str, int]) -> int:
+    if isinstance(storage, int):
+        return storage
+    # Suffixes are looked up directly, two letter ones first
+    factor = _BINARY_SUFFIX_TO_FACTOR.get(storage[-2:])
+    if factor is not None:
+        return factor * int(storage[:-2])
+    factor = _DECIMAL_SUFFIX_TO_FACTOR.get(storage[-1:])
+    if factor is not None:
+        return factor * int(storage[:-1])
+    return int(float(storage))
 
 
 @dataclass(frozen=True)
@@ -120,7 +131,11 @@ class MergeDiff:
 
     @classmethod
     def make_add_annotations_diff(cls, annotation_key: str, value: str) -> "MergeDiff":
-        return cls({"metadata": {"annotations": {annotation_key: value}}})
+        return cls.make_update_annotations_diff({annotation_key: value})
+
+    @classmethod
+    def make_update_annotations_diff(cls, annotations: dict[str, str]) -> "MergeDiff":
+        return cls({"metadata": {"annotations": annotations}})
 
 
 @dataclass(frozen=True)
@@ -132,6 +147,9 @@ class PersistentVolumeClaimRead:
     storage_real: Optional[int]
     labels: dict[str, str]
     annotations: dict[str, str]
+    resource_version: Optional[str] = None
+    # Deletion was requested, but the pvc is still kept by finalizers
+    is_terminating: bool = False
 
     class Phase(str, Enum):
         """Possible values for phase of PVC.
@@ -146,37 +164,63 @@ class PersistentVolumeClaimRead:
 
     @classmethod
     def from_primitive(cls, payload: dict[str, Any]) -> "PersistentVolumeClaimRead":
-        try:
-            storage_real: Optional[int] = _storage_str_to_int(
-                payload["status"]["capacity"]["storage"]
-            )
-        except KeyError:
-            storage_real = None
+        metadata = payload["metadata"]
+        spec = payload["spec"]
+        status = payload["status"]
+        capacity = status.get("capacity")
+        storage = capacity.get("storage") if capacity is not None else None
         return cls(
-            name=payload["metadata"]["name"],
-            storage_class_name=payload["spec"]["storageClassName"],
-            phase=cls.Phase(payload["status"]["phase"]),
+            name=metadata["name"],
+            storage_class_name=spec["storageClassName"],
+            phase=cls.Phase(status["phase"]),
             storage_requested=_storage_str_to_int(
-                payload["spec"]["resources"]["requests"]["storage"]
+                spec["resources"]["requests"]["storage"]
             ),
-            storage_real=storage_real,
-            labels=payload["metadata"].get("labels", dict()),
-            annotations=payload["metadata"].get("annotations", dict()),
+            storage_real=_storage_str_to_int(storage) if storage is not None else None,
+            labels=metadata.get("labels", dict()),
+            annotations=metadata.get("annotations", dict()),
+            resource_version=metadata.get("resourceVersion"),
+            is_terminating="deletionTimestamp" in metadata,
+        )
+
+
+@dataclass(frozen=True)
+class PersistentVolumeClaimListResult:
+    resource_version: str
+    pvcs: list[PersistentVolumeClaimRead]
+
+    @classmethod
+    def from_primitive(
+        cls, payload: dict[str, Any]
+    ) -> "PersistentVolumeClaimListResult":
+        return PersistentVolumeClaimListResult(
+            resource_version=payload["metadata"]["resourceVersion"],
+            pvcs=[
+                PersistentVolumeClaimRead.from_primitive(item)
+                for item in payload.get("items", [])
+            ],
         )
 
 
 @dataclass(frozen=True)
 class PodRead:
     pvc_in_use: list[str]
+    name: str = ""
+    # Set once the pod is scheduled, so it is not a part of pod identity
+    node_name: Optional[str] = field(default=None, compare=False)
 
     @classmethod
     def from_primitive(cls, payload: dict[str, Any]) -> "PodRead":
-        pvc_names = []
-        for volume in payload["spec"].get("volumes", []):
-            pvc_data = volume.get("persistentVolumeClaim")
-            if pvc_data:
-                pvc_names.append(pvc_data["claimName"])
-        return PodRead(pvc_in_use=pvc_names)
+        spec = payload["spec"]
+        return PodRead(
+            pvc_in_use=[
+                volume["persistentVolumeClaim"]["claimName"]
+                for volume in spec.get("volumes", ())
+                if "persistentVolumeClaim" in volume
+            ],
+            name=payload["metadata"]["name"],
+            node_name=spec.get("nodeName"),
+        )
 
 
 @dataclass(frozen=True)
@@ -223,7 +267,9 @@ class PodWatchEvent:
                 pod=PodRead([]),
             )
         return PodWatchEvent(
-            type=event_type, pod=PodRead.from_primitive(payload["object"])
+            type=event_type,
+            pod=PodRead.from_primitive(payload["object"]),
+            resource_version=payload["object"]["metadata"].get("resourceVersion"),
         )
 
     @classmethod
@@ -232,7 +278,33 @@ class PodWatchEvent:
 
 
 @dataclass(frozen=True)
-class PVCVolumeMetrics:
+class PersistentVolumeClaimWatchEvent:
+    type: PodWatchEvent.Type
+    resource_version: str
+    pvc: Optional[PersistentVolumeClaimRead] = None  # None for bookmarks
+
+    Type = PodWatchEvent.Type
+
+    @classmethod
+    def from_primitive(
+        cls, payload: dict[str, Any]
+    ) -> "PersistentVolumeClaimWatchEvent":
+        event_type = cls.Type(payload["type"])
+        obj = payload["object"]
+        return PersistentVolumeClaimWatchEvent(
+            type=event_type,
+            resource_version=obj["metadata"]["resourceVersion"],
+            pvc=(
+                None
+                if event_type == cls.Type.BOOKMARK
+                else PersistentVolumeClaimRead.from_primitive(obj)
+            ),
+        )
+
+
+class PVCVolumeMetrics(NamedTuple):
+    # A tuple is much cheaper to create than a frozen dataclass,
+    # and there is one per mounted volume on every stats pass
     pvc_name: str
     used_bytes: int
 
@@ -454,16 +526,50 @@ class KubeClient:
         return PersistentVolumeClaimRead.from_primitive(payload)
 
     async def list_pvc(
-        self, label_selector: Optional[str] = None
+        self,
+        label_selector: Optional[str] = None,
+        resource_version: Optional[str] = None,
     ) -> list[PersistentVolumeClaimRead]:
-        url = URL(self._pvc_url)
+        """List pvcs.
+
+        Pass resource_version="0" to get a possibly stale list served
+        from the apiserver watch cache instead of a quorum read from etcd.
+        """
+        result = await self.list_pvc_result(label_selector, resource_version)
+        return result.pvcs
+
+    async def list_pvc_result(
+        self,
+        label_selector: Optional[str] = None,
+        resource_version: Optional[str] = None,
+        limit: Optional[int] = 500,
+    ) -> PersistentVolumeClaimListResult:
+        """List pvcs page by page, so only one page is decoded at a time.
+
+        Paging is ignored by the apiserver for lists served from the
+        watch cache (resource_version="0").
+        """
+        params = {}
         if label_selector:
-            url = url.with_query(labelSelector=label_selector)
-        payload = await self._request(method="GET", url=url)
-        return [
-            PersistentVolumeClaimRead.from_primitive(item)
-            for item in payload.get("items", [])
-        ]
+            params["labelSelector"] = label_selector
+        resource_version, items = await self._list_paged(
+            self._pvc_url, resource_version, limit, params
+        )
+        return PersistentVolumeClaimListResult(
+            resource_version=resource_version,
+            pvcs=[PersistentVolumeClaimRead.from_primitive(item) for item in items],
+        )
+
+    async def watch_pvc(
+        self,
+        resource_version: Optional[str] = None,
+        label_selector: Optional[str] = None,
+    ) -> AsyncIterator[PersistentVolumeClaimWatchEvent]:
+        params = {}
+        if label_selector:
+            params["labelSelector"] = label_selector
+        async for payload in self._watch(self._pvc_url, resource_version, params):
+            yield PersistentVolumeClaimWatchEvent.from_primitive(payload)
 
     async def get_pvc(self, pvc_name: str) -> PersistentVolumeClaimRead:
         url = self._generate_pvc_url(pvc_name)
@@ -482,22 +588,85 @@ class KubeClient:
         )
         return PersistentVolumeClaimRead.from_primitive(payload)
 
-    async def remove_pvc(self, pvc_name: str) -> None:
-        url = self._generate_pvc_url(pvc_name)
+    async def remove_pvc(
+        self, pvc_name: str, propagation_policy: Optional[str] = None
+    ) -> None:
+        url = URL(self._generate_pvc_url(pvc_name))
+        if propagation_policy:
+            url = url.with_query(propagationPolicy=propagation_policy)
         await self._request(method="DELETE", url=url)
 
-    async def list_pods(self) -> PodListResult:
-        url = self._pod_url
-        payload = await self._request(method="GET", url=url)
-        return PodListResult.from_primitive(payload)
+    async def list_pods(
+        self,
+        resource_version: Optional[str] = None,
+        limit: Optional[int] = 500,
+        label_selector: Optional[str] = None,
+    ) -> PodListResult:
+        """List pods page by page.
+
+        Pass resource_version="0" to serve the list from the apiserver
+        watch cache, paging is ignored in that case.
+        """
+        params = {}
+        if label_selector:
+            params["labelSelector"] = label_selector
+        resource_version, items = await self._list_paged(
+            self._pod_url, resource_version, limit, params
+        )
+        return PodListResult(
+            resource_version=resource_version,
+            pods=[PodRead.from_primitive(item) for item in items],
+        )
+
+    async def _list_paged(
+        self,
+        url: str,
+        resource_version: Optional[str] = None,
+        limit: Optional[int] = None,
+        params: Optional[dict[str, str]] = None,
+    ) -> tuple[str, list[dict[str, Any]]]:
+        """List all items page by page.
+
+        Returns the resource version of the list and raw items.
+        """
+        params = dict(params or {})
+        if resource_version:
+            params["resourceVersion"] = resource_version
+        if limit:
+            params["limit"] = str(limit)
+        items: list[dict[str, Any]] = []
+        while True:
+            payload = await self._request(method="GET", url=URL(url).with_query(params))
+            items.extend(payload.get("items") or ())
+            metadata = payload["metadata"]
+            continue_token = metadata.get("continue")
+            if not continue_token:
+                return metadata["resourceVersion"], items
+            # Next pages are consistent with the first one, resourceVersion
+            # must not be passed along with the continue token
+            params.pop("resourceVersion", None)
+            params["continue"] = continue_token
 
     async def watch_pods(
-        self, resource_version: Optional[str] = None
+        self,
+        resource_version: Optional[str] = None,
+        label_selector: Optional[str] = None,
     ) -> AsyncIterator[PodWatchEvent]:
-        params = dict(watch="true", allowWatchBookmarks="true")
+        params = {}
+        if label_selector:
+            params["labelSelector"] = label_selector
+        async for payload in self._watch(self._pod_url, resource_version, params):
+            yield PodWatchEvent.from_primitive(payload)
+
+    async def _watch(
+        self,
+        url: str,
+        resource_version: Optional[str] = None,
+        params: Optional[dict[str, str]] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        params = dict(params or {}, watch="true", allowWatchBookmarks="true")
         if resource_version:
             params["resourceVersion"] = resource_version
-        url = self._pod_url
         assert self._client, "client is not initialized"
         timeout = ClientTimeout(
             connect=self._conn_timeout_s,
@@ -520,19 +689,63 @@ class KubeClient:
                     if PodWatchEvent.is_error(payload):
                         self._raise_for_status(payload["object"])
 
-                    yield PodWatchEvent.from_primitive(payload)
+                    yield payload
             except asyncio.TimeoutError:
                 pass
 
-    async def get_pvc_volumes_metrics(self) -> AsyncIterator[PVCVolumeMetrics]:
+    async def get_pvc_volumes_metrics(
+        self, concurrency: int = 16, node_names: Optional[Collection[str]] = None
+    ) -> AsyncIterator[PVCVolumeMetrics]:
+        """Get used bytes of mounted pvcs.
+
+        Only the given nodes are checked if node_names is passed.
+        """
         # Get list of all nodes
         nodes_url = f"{self._api_v1_url}/nodes"
         payload = await self._request(method="GET", url=nodes_url)
-        nodes_list = payload.get("items", [])
-        for node in nodes_list:
-            # Check stats for each node
-            node_name = node["metadata"]["name"]
-            node_summary_url = f"{nodes_url}/{node_name}/proxy/stats/summary"
+        names = [node["metadata"]["name"] for node in payload.get("items", [])]
+        if node_names is not None:
+            names = [name for name in names if name in node_names]
+        # Check stats for each node, several nodes at a time. Summaries
+        # are yielded as soon as they arrive, so the caller can process
+        # them while other nodes are still being fetched.
+        semaphore = asyncio.Semaphore(concurrency)
+        queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+        async def _fetch(node_name: str) -> None:
+            try:
+                summary = await self._get_node_stats_summary(
+                    nodes_url, node_name, semaphore
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to get node %s stats", node_name)
+                summary = {}
+            await queue.put(summary)
+
+        tasks = [asyncio.create_task(_fetch(name)) for name in names]
+        try:
+            for _ in tasks:
+                summary = await queue.get()
+                for pod in summary.get("pods", []):
+                    for volume in pod.get("volume", []):
+                        try:
+                            yield PVCVolumeMetrics(
+                                pvc_name=volume["pvcRef"]["name"],
+                                used_bytes=volume["usedBytes"],
+                            )
+                        except KeyError:
+                            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _get_node_stats_summary(
+        self, nodes_url: str, node_name: str, semaphore: asyncio.Semaphore
+    ) -> dict[str, Any]:
+        node_summary_url = f"{nodes_url}/{node_name}/proxy/stats/summary"
+        async with semaphore:
             try:
                 # not self._request since response has a different structure
                 # (does not contain `status` field)
@@ -540,7 +753,8 @@ class KubeClient:
                 async with self._client.request(
                     method="GET", url=node_summary_url, headers=self._create_headers()
                 ) as resp:
-                    payload = await resp.json()
+                    # Summaries are large, decode them with the faster parser
+                    return await resp.json(loads=orjson.loads)
             except aiohttp.ContentTypeError as exc:
                 logger.exception(
                     "Failed to parse node stats. "
@@ -548,16 +762,7 @@ class KubeClient:
                     exc.status,
                     exc.headers,
                 )
-                continue
-            for pod in payload.get("pods", []):
-                for volume in pod.get("volume", []):
-                    try:
-                        yield PVCVolumeMetrics(
-                            pvc_name=volume["pvcRef"]["name"],
-                            used_bytes=volume["usedBytes"],
-                        )
-                    except KeyError:
-                        pass
+                return {}
 
     async def create_disk_naming(self, disk_naming: DiskNaming) -> None:
         url = self._disk_naming_url
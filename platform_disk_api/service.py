@@ -1,11 +1,15 @@
+import asyncio
 import logging
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional, TypeVar
+from functools import lru_cache
+from typing import Optional
 from uuid import uuid4
 
+from .informer import PVCInformer
 from .kube_client import (
     DiskNaming,
     KubeClient,
@@ -42,6 +46,8 @@ DISK_API_USED_BYTES_ANNOTATION = "platform.neuromation.io/disk-api-used-bytes"
 
 NO_ORG = "NO_ORG"
 
+DISK_PVC_LABEL_SELECTOR = f"{DISK_API_MARK_LABEL}=true,!{DISK_API_DELETED_LABEL}"
+
 
 @dataclass(frozen=True)
 class DiskRequest:
@@ -75,13 +81,52 @@ class Disk:
             return str(self.value)
 
 
+_STATUS_MAP = {
+    PersistentVolumeClaimRead.Phase.PENDING: Disk.Status.PENDING,
+    PersistentVolumeClaimRead.Phase.BOUND: Disk.Status.READY,
+    PersistentVolumeClaimRead.Phase.LOST: Disk.Status.BROKEN,
+}
+
+
+def _encode_name(name: str) -> str:
+    # "/" is not allowed in k8s names and label values. Percent-encoding
+    # does not fit either, and existing resources already use "--".
+    return name.replace("/", "--")
+
+
+def _decode_name(name: str) -> str:
+    return name.replace("--", "/")
+
+
+def _is_org_pvc(pvc: PersistentVolumeClaimRead, org_name: Optional[str]) -> bool:
+    if not org_name:
+        return True
+    if org_name.upper() == NO_ORG:
+        return DISK_API_ORG_LABEL not in pvc.labels
+    return pvc.labels.get(DISK_API_ORG_LABEL) == org_name
+
+
 class Service:
-    def __init__(self, kube_client: KubeClient, storage_class_name: str) -> None:
+    def __init__(
+        self,
+        kube_client: KubeClient,
+        storage_class_name: str,
+        pvc_informer: Optional[PVCInformer] = None,
+        disk_cache_size: int = 4096,
+        legacy_pvc_backfill: bool = True,
+    ) -> None:
         self._kube_client = kube_client
         self._storage_class_name = storage_class_name
-
+        # When set, it is used to serve cached disk lists
+        self._pvc_informer = pvc_informer
+        # Disks are immutable, so unchanged pvcs can share converted disks
+        self._disk_cache: OrderedDict[tuple[str, str], Disk] = OrderedDict()
+        self._disk_cache_size = disk_cache_size
+        self._legacy_pvc_backfill = legacy_pvc_backfill
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
     def _get_disk_naming_name(
-        self,
         name: str,
         owner: Optional[str],
         org_name: Optional[str],
@@ -96,7 +141,7 @@ class Service:
             prefix = f"{name}--{org_name}"
         else:
             prefix = name
-        return f"{prefix}--{project_name.replace('/', '--')}"
+        return f"{prefix}--{_encode_name(project_name)}"
 
     def _request_to_pvc(
         self, request: DiskRequest, username: str
@@ -111,7 +156,7 @@ class Service:
         if request.name:
             annotations[DISK_API_NAME_ANNOTATION] = request.name
         labels = {
-            USER_LABEL: username.replace("/", "--"),
+            USER_LABEL: _encode_name(username),
             DISK_API_MARK_LABEL: "true",
         }
         if request.org_name:
@@ -120,51 +165,101 @@ class Service:
             labels[PROJECT_LABEL] = request.project_name
 
         return PersistentVolumeClaimWrite(
-            name=f"disk-{uuid4()}",
+            name=f"disk-{uuid4().hex}",
             storage=request.storage,
             storage_class_name=self._storage_class_name,
             labels=labels,
             annotations=annotations,
         )
 
-    async def _pvc_to_disk(self, pvc: PersistentVolumeClaimRead) -> Disk:
-        status_map = {
-            PersistentVolumeClaimRead.Phase.PENDING: Disk.Status.PENDING,
-            PersistentVolumeClaimRead.Phase.BOUND: Disk.Status.READY,
-            PersistentVolumeClaimRead.Phase.LOST: Disk.Status.BROKEN,
-        }
+    def _needs_backfill(self, pvc: PersistentVolumeClaimRead) -> bool:
+        return (
+            self._legacy_pvc_backfill
+            and DISK_API_CREATED_AT_ANNOTATION not in pvc.annotations
+        )
+
+    async def _pvc_to_disk(
+        self, pvc: PersistentVolumeClaimRead, now: Optional[str] = None
+    ) -> Disk:
+        if self._needs_backfill(pvc):
+            pvc = await self._backfill_pvc_annotations(pvc, now)
+        return self._build_disk(pvc)
+
+    async def migrate_legacy_pvcs(self, concurrency: int = 16) -> int:
+        """Backfill annotations of all pvcs created by older versions.
+
+        Once it is done, disks can be read with legacy_pvc_backfill disabled.
+        Returns the number of patched pvcs.
+        """
+        pvcs = await self._kube_client.list_pvc(DISK_PVC_LABEL_SELECTOR)
+        legacy_pvcs = [
+            pvc for pvc in pvcs if DISK_API_CREATED_AT_ANNOTATION not in pvc.annotations
+        ]
+        now = datetime_dump(utc_now())
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _backfill(pvc: PersistentVolumeClaimRead) -> None:
+            async with semaphore:
+                await self._backfill_pvc_annotations(pvc, now)
+
+        await asyncio.gather(*(_backfill(pvc) for pvc in legacy_pvcs))
+        return len(legacy_pvcs)
+
+    async def _backfill_pvc_annotations(
+        self, pvc: PersistentVolumeClaimRead, now: Optional[str] = None
+    ) -> PersistentVolumeClaimRead:
+        # Batch callers pass a single dumped timestamp for all pvcs
+        missing_annotations = {}
         if DISK_API_CREATED_AT_ANNOTATION not in pvc.annotations:
             # This is old pvc, created before we added created_at field.
-            diff = MergeDiff.make_add_annotations_diff(
-                DISK_API_CREATED_AT_ANNOTATION, datetime_dump(utc_now())
+            missing_annotations[DISK_API_CREATED_AT_ANNOTATION] = now or datetime_dump(
+                utc_now()
             )
-            pvc = await self._kube_client.update_pvc(pvc.name, diff)
-
-        _T = TypeVar("_T")
-
-        def _get_if_present(
-            annotation: str, mapper: Callable[[str], _T]
-        ) -> Optional[_T]:
-            if annotation in pvc.annotations:
-                return mapper(pvc.annotations[annotation])
-            return None
-
-        username = pvc.labels[USER_LABEL].replace("--", "/")
-        last_usage = _get_if_present(DISK_API_LAST_USAGE_ANNOTATION, datetime_load)
-        life_span = _get_if_present(DISK_API_LIFE_SPAN_ANNOTATION, timedelta_load)
-        used_bytes = _get_if_present(DISK_API_USED_BYTES_ANNOTATION, int)
+        if not missing_annotations:
+            return pvc
+        # Backfill everything with a single patch
+        diff = MergeDiff.make_update_annotations_diff(missing_annotations)
+        return await self._kube_client.update_pvc(pvc.name, diff)
+
+    def _build_disk(self, pvc: PersistentVolumeClaimRead) -> Disk:
+        if pvc.resource_version is None:
+            return self._convert_pvc_to_disk(pvc)
+        cache_key = (pvc.name, pvc.resource_version)
+        disk = self._disk_cache.get(cache_key)
+        if disk is not None:
+            self._disk_cache.move_to_end(cache_key)
+            return disk
+        disk = self._convert_pvc_to_disk(pvc)
+        self._disk_cache[cache_key] = disk
+        if len(self._disk_cache) > self._disk_cache_size:
+            self._disk_cache.popitem(last=False)
+        return disk
+
+    def _convert_pvc_to_disk(self, pvc: PersistentVolumeClaimRead) -> Disk:
+        status = _STATUS_MAP[pvc.phase]
+        annotations = pvc.annotations
+        username = _decode_name(pvc.labels[USER_LABEL])
+        raw = annotations.get(DISK_API_LAST_USAGE_ANNOTATION)
+        last_usage = datetime_load(raw) if raw is not None else None
+        raw = annotations.get(DISK_API_LIFE_SPAN_ANNOTATION)
+        life_span = timedelta_load(raw) if raw is not None else None
+        raw = annotations.get(DISK_API_USED_BYTES_ANNOTATION)
+        used_bytes = int(raw) if raw is not None else None
+        raw = annotations.get(DISK_API_CREATED_AT_ANNOTATION)
+        # Can be missing only if backfill is disabled before the migration
+        created_at = datetime_load(raw) if raw is not None else utc_now()
 
         return Disk(
             id=pvc.name,
             storage=pvc.storage_real
             if pvc.storage_real is not None
             else pvc.storage_requested,
-            status=status_map[pvc.phase],
+            status=status,
             owner=username,
             project_name=pvc.labels.get(PROJECT_LABEL, username),
             name=pvc.annotations.get(DISK_API_NAME_ANNOTATION),
             org_name=pvc.labels.get(DISK_API_ORG_LABEL),
-            created_at=datetime_load(pvc.annotations[DISK_API_CREATED_AT_ANNOTATION]),
+            created_at=created_at,
             last_usage=last_usage,
             life_span=life_span,
             used_bytes=used_bytes,
@@ -180,6 +275,8 @@ class Service:
                 project_name=request.project_name,
             )
             disk_naming = DiskNaming(name=disk_naming_name, disk_id=pvc_write.name)
+            # The disk naming is a lock for the name, so it has to be created
+            # before the pvc
             try:
                 await self._kube_client.create_disk_naming(disk_naming)
             except ResourceExists:
@@ -191,10 +288,16 @@ class Service:
             pvc_read = await self._kube_client.create_pvc(pvc_write)
         except Exception:
             if request.name:
-                await self._kube_client.remove_disk_naming(disk_naming_name)
+                await self._remove_disk_naming_safe(disk_naming_name)
             raise
         return await self._pvc_to_disk(pvc_read)
 
+    async def _remove_disk_naming_safe(self, name: str) -> None:
+        try:
+            await self._kube_client.remove_disk_naming(name)
+        except Exception:
+            logger.exception("Failed to remove disk naming %s", name)
+
     async def get_disk(self, disk_id: str) -> Disk:
         try:
             pvc = await self._kube_client.get_pvc(disk_id)
@@ -252,29 +355,65 @@ class Service:
         return await self._pvc_to_disk(pvc)
 
     async def get_all_disks(
-        self, org_name: Optional[str] = None, project_name: Optional[str] = None
+        self,
+        org_name: Optional[str] = None,
+        project_name: Optional[str] = None,
+        *,
+        cached: bool = False,
     ) -> list[Disk]:
-        label_selectors = []
-        if org_name and org_name.upper() == NO_ORG:
-            label_selectors += [f"!{DISK_API_ORG_LABEL}"]
-        elif org_name:
-            label_selectors += [f"{DISK_API_ORG_LABEL}={org_name}"]
-        label_selector = ",".join(label_selectors) if label_selectors else None
+        """Get all disks, optionally filtered by org and project.
+
+        With cached=True the result can be slightly stale, use it only
+        where it is fine to miss the most recent changes.
+        """
         disks = []
-        for pvc in await self._kube_client.list_pvc(label_selector):
-            if not pvc.labels.get(DISK_API_MARK_LABEL, False) or pvc.labels.get(
-                DISK_API_DELETED_LABEL, False
-            ):
-                continue
+        legacy_pvcs = []
+        for pvc in await self._list_disk_pvcs(org_name, cached=cached):
             if project_name:
-                disk_project_name = pvc.labels.get(PROJECT_LABEL) or pvc.labels[
-                    USER_LABEL
-                ].replace("--", "/")
+                disk_project_name = pvc.labels.get(PROJECT_LABEL) or _decode_name(
+                    pvc.labels[USER_LABEL]
+                )
                 if project_name != disk_project_name:
                     continue
-            disks.append(await self._pvc_to_disk(pvc))
+            if self._needs_backfill(pvc):
+                legacy_pvcs.append(pvc)
+            else:
+                disks.append(self._build_disk(pvc))
+        if legacy_pvcs:
+            # Legacy pvcs have to be patched, do it concurrently
+            now = datetime_dump(utc_now())
+            disks.extend(
+                await asyncio.gather(
+                    *(self._pvc_to_disk(pvc, now) for pvc in legacy_pvcs)
+                )
+            )
         return disks
 
+    async def _list_disk_pvcs(
+        self, org_name: Optional[str], *, cached: bool
+    ) -> list[PersistentVolumeClaimRead]:
+        if cached and self._pvc_informer:
+            await self._pvc_informer.wait_synced()
+            return [
+                pvc
+                for pvc in self._pvc_informer.pvcs
+                # Same as DISK_PVC_LABEL_SELECTOR
+                if pvc.labels.get(DISK_API_MARK_LABEL) == "true"
+                and DISK_API_DELETED_LABEL not in pvc.labels
+                and not pvc.is_terminating
+                and _is_org_pvc(pvc, org_name)
+            ]
+        label_selectors = [DISK_PVC_LABEL_SELECTOR]
+        if org_name and org_name.upper() == NO_ORG:
+            label_selectors += [f"!{DISK_API_ORG_LABEL}"]
+        elif org_name:
+            label_selectors += [f"{DISK_API_ORG_LABEL}={org_name}"]
+        label_selector = ",".join(label_selectors)
+        resource_version = "0" if cached else None
+        pvcs = await self._kube_client.list_pvc(label_selector, resource_version)
+        # Pvcs being deleted can be kept for a while by finalizers
+        return [pvc for pvc in pvcs if not pvc.is_terminating]
+
     async def remove_disk(self, disk_id: str) -> None:
         try:
             disk = await self.get_disk(disk_id)
@@ -289,12 +428,13 @@ class Service:
                     await self._kube_client.remove_disk_naming(disk_naming_name)
                 except ResourceNotFound:
                     pass  # already removed
-            diff = MergeDiff.make_add_label_diff(DISK_API_DELETED_LABEL, "true")
-            await self._kube_client.update_pvc(disk_id, diff)
-            await self._kube_client.remove_pvc(disk_id)
+            await self._remove_pvc(disk_id)
         except ResourceNotFound:
             raise DiskNotFound
 
+    async def _remove_pvc(self, pvc_name: str) -> None:
+        await self._kube_client.remove_pvc(pvc_name, propagation_policy="Background")
+
     async def mark_disk_usage(self, disk_id: str, time: datetime) -> None:
         diff = MergeDiff.make_add_annotations_diff(
             DISK_API_LAST_USAGE_ANNOTATION, datetime_dump(time)
@@ -304,11 +444,51 @@ class Service:
         except ResourceNotFound:
             raise DiskNotFound
 
-    async def update_disk_used_bytes(self, disk_id: str, used_bytes: int) -> None:
+    async def mark_disk_usage_bulk(
+        self, disk_ids: Iterable[str], time: datetime, concurrency: int = 16
+    ) -> None:
+        """Mark usage of many disks at once, missing disks are skipped.
+
+        There is no bulk patch in kubernetes, so the same diff is applied
+        to all pvcs, at most concurrency at a time.
+        """
         diff = MergeDiff.make_add_annotations_diff(
-            DISK_API_USED_BYTES_ANNOTATION, str(used_bytes)
+            DISK_API_LAST_USAGE_ANNOTATION, datetime_dump(time)
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(
+            *(
+                self._update_pvc_if_exists(disk_id, diff, semaphore)
+                for disk_id in disk_ids
+            )
         )
+
+    async def _update_pvc_if_exists(
+        self, pvc_name: str, diff: MergeDiff, semaphore: asyncio.Semaphore
+    ) -> None:
         try:
-            await self._kube_client.update_pvc(disk_id, diff)
+            async with semaphore:
+                await self._kube_client.update_pvc(pvc_name, diff)
         except ResourceNotFound:
-            raise DiskNotFound
+            pass
+
+    async def update_disk_used_bytes_bulk(
+        self, used_bytes: Mapping[str, int], concurrency: int = 16
+    ) -> None:
+        """Update used bytes of many disks at once, missing disks are skipped.
+
+        At most concurrency pvcs are patched at a time.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(
+            *(
+                self._update_pvc_if_exists(
+                    disk_id,
+                    MergeDiff.make_add_annotations_diff(
+                        DISK_API_USED_BYTES_ANNOTATION, str(disk_used_bytes)
+                    ),
+                    semaphore,
+                )
+                for disk_id, disk_used_bytes in used_bytes.items()
+            )
+        )
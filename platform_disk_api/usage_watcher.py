@@ -1,6 +1,7 @@
 import asyncio
+import heapq
 import logging
-from collections.abc import Iterable
+from collections.abc import Collection, Iterable
 from datetime import datetime
 from typing import Optional
 
@@ -17,6 +18,7 @@ from neuro_logging import (
 from platform_disk_api.api import create_kube_client
 from platform_disk_api.config import DiskUsageWatcherConfig
 from platform_disk_api.config_factory import EnvironConfigFactory
+from platform_disk_api.informer import PodPVCIndex, PVCInformer
 from platform_disk_api.kube_client import (
     KubeClient,
     KubeClientExpired,
@@ -24,41 +26,110 @@ from platform_disk_api.kube_client import (
     PodWatchEvent,
     ResourceGone,
 )
-from platform_disk_api.service import DiskNotFound, Service
+from platform_disk_api.service import (
+    DISK_PVC_LABEL_SELECTOR,
+    Disk,
+    DiskNotFound,
+    Service,
+)
 from platform_disk_api.utils import utc_now
 
 logger = logging.getLogger(__name__)
 
 
 async def update_last_used(
-    service: Service, pvc_names: Iterable[str], time: datetime
+    service: Service, pvc_names: Collection[str], time: datetime
+) -> None:
+    if not pvc_names:
+        return
+    await service.mark_disk_usage_bulk(pvc_names, time)
+
+
+async def _flush_pending(service: Service, pending: set[str]) -> None:
+    if not pending:
+        return
+    pvc_names = set(pending)
+    pending.clear()
+    try:
+        async with new_trace_cm(name="watch_disk_usage"):
+            await update_last_used(service, pvc_names, utc_now())
+    except asyncio.CancelledError:
+        # Keep the interrupted batch for the final flush on shutdown
+        pending.update(pvc_names)
+        raise
+    except Exception:
+        logger.exception("Failed to update disk usage")
+        # Marking usage again is harmless, retry with the next flush
+        pending.update(pvc_names)
+
+
+async def _flush_last_used(
+    service: Service, pending: set[str], flush_interval: float
+) -> None:
+    while True:
+        await asyncio.sleep(flush_interval)
+        await _flush_pending(service, pending)
+
+
+async def watch_disk_usage(
+    kube_client: KubeClient,
+    service: Service,
+    pod_index: Optional[PodPVCIndex] = None,
+    pod_label_selector: Optional[str] = None,
+    flush_interval: float = 0.2,
 ) -> None:
-    for pvc_name in pvc_names:
+    # Pods often get several events in a row, their pvcs are collected
+    # here and marked as used together every flush_interval
+    pending: set[str] = set()
+    flusher = asyncio.create_task(_flush_last_used(service, pending, flush_interval))
+    try:
+        await _watch_disk_usage(
+            kube_client, service, pending, pod_index, pod_label_selector
+        )
+    finally:
+        flusher.cancel()
         try:
-            await service.mark_disk_usage(pvc_name, time)
-        except DiskNotFound:
+            await flusher
+        except asyncio.CancelledError:
             pass
+        # Do not lose usage collected since the last flush
+        await _flush_pending(service, pending)
 
 
-async def watch_disk_usage(kube_client: KubeClient, service: Service) -> None:
+async def _watch_disk_usage(
+    kube_client: KubeClient,
+    service: Service,
+    pending: set[str],
+    pod_index: Optional[PodPVCIndex],
+    pod_label_selector: Optional[str],
+) -> None:
     resource_version: Optional[str] = None
     while True:
         try:
             if resource_version is None:
                 async with new_trace_cm(name="watch_disk_usage_start"):
-                    list_result = await kube_client.list_pods()
+                    # Stale list is fine, watch will deliver the rest
+                    list_result = await kube_client.list_pods(
+                        resource_version="0", label_selector=pod_label_selector
+                    )
                     now = utc_now()
                     pvc_names = {
                         pvc for pod in list_result.pods for pvc in pod.pvc_in_use
                     }
                     await update_last_used(service, pvc_names, now)
+                    if pod_index is not None:
+                        pod_index.reset(list_result.pods)
                     resource_version = list_result.resource_version
-            async for event in kube_client.watch_pods(resource_version):
-                async with new_trace_cm(name="watch_disk_usage"):
-                    if event.type == PodWatchEvent.Type.BOOKMARK:
-                        resource_version = event.resource_version
-                    else:
-                        await update_last_used(service, event.pod.pvc_in_use, utc_now())
+            async for event in kube_client.watch_pods(
+                resource_version, pod_label_selector
+            ):
+                # Resume from the latest seen version after reconnects
+                if event.resource_version:
+                    resource_version = event.resource_version
+                if pod_index is not None:
+                    pod_index.handle_event(event)
+                if event.type != PodWatchEvent.Type.BOOKMARK:
+                    pending.update(event.pod.pvc_in_use)
         except asyncio.CancelledError:
             raise
         except ResourceGone:
@@ -72,42 +143,119 @@ async def watch_disk_usage(kube_client: KubeClient, service: Service) -> None:
 
 
 async def watch_used_bytes(
-    kube_client: KubeClient, service: Service, check_interval: float = 60
+    kube_client: KubeClient,
+    service: Service,
+    check_interval: float = 60,
+    pod_index: Optional[PodPVCIndex] = None,
 ) -> None:
+    loop = asyncio.get_running_loop()
     while True:
         try:
+            # Interval is counted from the start of the pass, so slow
+            # passes don't stretch it
+            started_at = loop.time()
             async with new_trace_cm(name="watch_used_bytes"):
-                async for stat in kube_client.get_pvc_volumes_metrics():
-                    try:
-                        await service.update_disk_used_bytes(
-                            stat.pvc_name, stat.used_bytes
-                        )
-                    except DiskNotFound:
-                        pass
-            await asyncio.sleep(check_interval)
+                # Nodes without pods using pvcs have nothing to report
+                node_names = pod_index.node_names if pod_index else None
+                used_bytes = {
+                    stat.pvc_name: stat.used_bytes
+                    async for stat in kube_client.get_pvc_volumes_metrics(
+                        node_names=node_names
+                    )
+                }
+                await service.update_disk_used_bytes_bulk(used_bytes)
+            await asyncio.sleep(max(0, started_at + check_interval - loop.time()))
         except asyncio.CancelledError:
             raise
         except Exception:
             logger.exception("Failed to update used bytes")
 
 
-async def watch_lifespan_ended(service: Service, check_interval: float = 600) -> None:
+def _get_lifespan_deadline(disk: Disk) -> Optional[datetime]:
+    if disk.life_span is None:
+        return None
+    lifespan_start = disk.last_usage or disk.created_at
+    return lifespan_start + disk.life_span
+
+
+def _is_lifespan_ended(disk: Disk, now: datetime) -> bool:
+    deadline = _get_lifespan_deadline(disk)
+    return deadline is not None and deadline < now
+
+
+def _make_deadlines(disks: Iterable[Disk]) -> list[tuple[datetime, str]]:
+    deadlines = []
+    for disk in disks:
+        deadline = _get_lifespan_deadline(disk)
+        if deadline is not None:
+            deadlines.append((deadline, disk.id))
+    heapq.heapify(deadlines)
+    return deadlines
+
+
+async def _remove_if_lifespan_ended(
+    service: Service, disk_id: str, now: datetime
+) -> None:
+    # Cached list can miss recent usage, recheck before removal
+    try:
+        disk = await service.get_disk(disk_id)
+        if _is_lifespan_ended(disk, now):
+            await service.remove_disk(disk.id)
+    except DiskNotFound:
+        pass
+
+
+async def watch_lifespan_ended(
+    service: Service,
+    check_interval: float = 600,
+    pvc_informer: Optional[PVCInformer] = None,
+) -> None:
+    # Heap of (deadline, disk id), rebuilt only when disks have changed
+    deadlines: list[tuple[datetime, str]] = []
+    revision: Optional[int] = None
+    loop = asyncio.get_running_loop()
     while True:
         try:
+            started_at = loop.time()
             async with new_trace_cm(name="watch_lifespan_ended"):
-                for disk in await service.get_all_disks():
-                    if disk.life_span is None:
-                        continue
-                    lifespan_start = disk.last_usage or disk.created_at
-                    if lifespan_start + disk.life_span < utc_now():
-                        await service.remove_disk(disk.id)
-            await asyncio.sleep(check_interval)
+                if pvc_informer is None or pvc_informer.revision != revision:
+                    # Only a successful rebuild consumes the revision, so a
+                    # failed one is retried on the next pass
+                    next_revision = pvc_informer.revision if pvc_informer else None
+                    deadlines = _make_deadlines(
+                        await service.get_all_disks(cached=True)
+                    )
+                    revision = next_revision
+                now = utc_now()
+                while deadlines and deadlines[0][0] < now:
+                    _, disk_id = heapq.heappop(deadlines)
+                    await _remove_if_lifespan_ended(service, disk_id, now)
+            # Wake up right when the next disk expires. Disks changed in
+            # the meantime are picked up at most check_interval later.
+            delay = max(0, started_at + check_interval - loop.time())
+            if deadlines:
+                next_delay = (deadlines[0][0] - utc_now()).total_seconds()
+                delay = max(0, min(delay, next_delay))
+            await asyncio.sleep(delay)
         except asyncio.CancelledError:
             raise
         except Exception:
             logger.exception("Failed to check lifespan")
 
 
+async def migrate_legacy_pvcs(service: Service, retry_interval: float = 60) -> None:
+    while True:
+        try:
+            migrated = await service.migrate_legacy_pvcs()
+            logger.info("Migrated %d legacy pvcs", migrated)
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to migrate legacy pvcs")
+        await asyncio.sleep(retry_interval)
+
+
 async def async_main(config: DiskUsageWatcherConfig) -> None:
     async with create_kube_client(
         config.kube, make_tracing_trace_configs(config)
@@ -115,11 +263,22 @@ async def async_main(config: DiskUsageWatcherConfig) -> None:
         # We are not going to create disks using this service
         # instance, so its safe to provide invalid storage
         # class name
-        service = Service(kube_client, "fake invalid value")
+        pvc_informer = PVCInformer(kube_client, DISK_PVC_LABEL_SELECTOR)
+        pod_index = PodPVCIndex()
+        service = Service(
+            kube_client,
+            "fake invalid value",
+            pvc_informer,
+            legacy_pvc_backfill=False,
+        )
         await asyncio.gather(
-            watch_disk_usage(kube_client, service),
-            watch_lifespan_ended(service),
-            watch_used_bytes(kube_client, service),
+            migrate_legacy_pvcs(service),
+            pvc_informer.run(),
+            watch_disk_usage(
+                kube_client, service, pod_index, config.pod_label_selector
+            ),
+            watch_lifespan_ended(service, pvc_informer=pvc_informer),
+            watch_used_bytes(kube_client, service, pod_index=pod_index),
         )
 
 
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 
 def utc_now() -> datetime:
@@ -9,6 +10,8 @@ def datetime_dump(dt: datetime) -> str:
     return str(dt.timestamp())
 
 
+# Annotation values rarely change between reads, and both results are immutable
+@lru_cache(maxsize=4096)
 def datetime_load(raw: str) -> datetime:
     return datetime.fromtimestamp(float(raw), timezone.utc)
 
@@ -17,5 +20,6 @@ def timedelta_dump(td: timedelta) -> str:
     return str(td.total_seconds())
 
 
+@lru_cache(maxsize=4096)
 def timedelta_load(raw: str) -> timedelta:
     return timedelta(seconds=float(raw))
@@ -2,13 +2,14 @@ import asyncio
 from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
 import aiodocker
 import pytest
 from aiohttp import ClientError
 from aiohttp.hdrs import AUTHORIZATION
-from async_timeout import timeout
 from jose import jwt
 from neuro_auth_client import AuthClient, Permission, User as AuthClientUser
 from yarl import URL
@@ -17,15 +18,22 @@ from platform_disk_api.config import AuthConfig
 from tests.integration.conftest import random_name
 
 
+@lru_cache(maxsize=None)
+def _read_auth_server_image_name() -> str:
+    return Path("PLATFORMAUTHAPI_IMAGE").read_text().strip()
+
+
 @pytest.fixture(scope="session")
 def auth_server_image_name() -> str:
-    with open("PLATFORMAUTHAPI_IMAGE") as f:
-        return f.read().strip()
+    return _read_auth_server_image_name()
 
 
 @pytest.fixture(scope="session")
 async def auth_server(
-    docker: aiodocker.Docker, reuse_docker: bool, auth_server_image_name: str
+    docker: aiodocker.Docker,
+    docker_image_tags: set[str],
+    reuse_docker: bool,
+    auth_server_image_name: str,
 ) -> AsyncIterator[AuthConfig]:
     image_name = auth_server_image_name
     container_name = "auth_server"
@@ -48,10 +56,9 @@ async def auth_server(
         except aiodocker.exceptions.DockerError:
             pass
 
-    try:
-        await docker.images.inspect(auth_server_image_name)
-    except aiodocker.exceptions.DockerError:
+    if auth_server_image_name not in docker_image_tags:
         await docker.images.pull(auth_server_image_name)
+        docker_image_tags.add(auth_server_image_name)
 
     container = await docker.containers.create_or_replace(
         name=container_name, config=container_config
@@ -63,10 +70,10 @@ async def auth_server(
     yield auth_config
 
     if not reuse_docker:
-        await container.kill()
         await container.delete(force=True)
 
 
+@lru_cache(maxsize=None)
 def create_token(name: str) -> str:
     payload = {"identity": name}
     return jwt.encode(payload, "secret", algorithm="HS256")
@@ -77,7 +84,7 @@ def token_factory() -> Callable[[str], str]:
     return create_token
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def admin_token(token_factory: Callable[[str], str]) -> str:
     return token_factory("admin")
 
@@ -95,7 +102,7 @@ async def create_auth_config(
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def auth_config(auth_server: AuthConfig) -> AsyncIterator[AuthConfig]:
     yield auth_server
 
@@ -106,25 +113,27 @@ async def create_auth_client(config: AuthConfig) -> AsyncGenerator[AuthClient, N
         yield client
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def auth_client(auth_server: AuthConfig) -> AsyncGenerator[AuthClient, None]:
     async with create_auth_client(auth_server) as client:
         yield client
 
 
 async def wait_for_auth_server(
-    config: AuthConfig, timeout_s: float = 30, interval_s: float = 1
+    config: AuthConfig, timeout_s: float = 30, interval_s: float = 0.2
 ) -> None:
-    async with timeout(timeout_s):
+    async def _wait(auth_client: AuthClient) -> None:
         while True:
             try:
-                async with create_auth_client(config) as auth_client:
-                    await auth_client.ping()
-                    break
+                await auth_client.ping()
+                return
             except (AssertionError, ClientError):
                 pass
             await asyncio.sleep(interval_s)
 
+    async with create_auth_client(config) as auth_client:
+        await asyncio.wait_for(_wait(auth_client), timeout=timeout_s)
+
 
 @dataclass(frozen=True)
 class _User:
@@ -32,19 +32,26 @@ pytest_plugins = [
 
 
 def random_name(length: int = 8) -> str:
-    return secrets.token_hex(length // 2 + length % 2)[:length]
+    return secrets.token_hex((length + 1) // 2)[:length]
 
 
 @pytest.fixture(scope="session")
 def event_loop() -> Iterator[asyncio.AbstractEventLoop]:
-    asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
-    loop = asyncio.get_event_loop_policy().new_event_loop()
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+        loop = asyncio.get_event_loop_policy().new_event_loop()
+
+        watcher = asyncio.SafeChildWatcher()
+        watcher.attach_loop(loop)
+        asyncio.get_event_loop_policy().set_child_watcher(watcher)
+    else:
+        # uvloop watches child processes itself
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        loop = asyncio.get_event_loop_policy().new_event_loop()
     loop.set_debug(True)
 
-    watcher = asyncio.SafeChildWatcher()
-    watcher.attach_loop(loop)
-    asyncio.get_event_loop_policy().set_child_watcher(watcher)
-
     yield loop
     loop.close()
 
@@ -54,9 +61,16 @@ async def k8s_storage_class() -> str:
     return "test-storage-class"  # Same as in storageclass.yml
 
 
-@pytest.fixture
+CLIENT_CONN_POOL_SIZE = 100
+CLIENT_KEEPALIVE_TIMEOUT_S = 60
+
+
+@pytest.fixture(scope="session")
 async def client() -> AsyncIterator[aiohttp.ClientSession]:
-    async with aiohttp.ClientSession() as session:
+    connector = aiohttp.TCPConnector(
+        limit=CLIENT_CONN_POOL_SIZE, keepalive_timeout=CLIENT_KEEPALIVE_TIMEOUT_S
+    )
+    async with aiohttp.ClientSession(connector=connector) as session:
         yield session
 
 
@@ -25,3 +25,10 @@ async def docker() -> AsyncIterator[aiodocker.Docker]:
     client = aiodocker.Docker(api_version="v1.34")
     yield client
     await client.close()
+
+
+@pytest.fixture(scope="session")
+async def docker_image_tags(docker: aiodocker.Docker) -> set[str]:
+    """Tags of local images, listed once and updated by fixtures pulling images."""
+    images = await docker.images.list()
+    return {tag for image in images for tag in image.get("RepoTags") or ()}
@@ -1,24 +1,36 @@
-import json
+import asyncio
+import os
 import subprocess
 import uuid
-from collections.abc import AsyncIterator, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any, Optional
 
+import orjson
 import pytest
+import yaml
+from yarl import URL
 
 from platform_disk_api.config import KubeClientAuthType, KubeConfig
-from platform_disk_api.kube_client import KubeClient, PodRead, ResourceNotFound
+from platform_disk_api.informer import PVCInformer
+from platform_disk_api.kube_client import KubeClient, PodRead
 
 
 @pytest.fixture(scope="session")
 def kube_config_payload() -> dict[str, Any]:
+    # kubectl treats an empty KUBECONFIG as unset
+    kube_config_path = os.environ.get("KUBECONFIG") or "~/.kube/config"
+    if os.pathsep not in kube_config_path:
+        try:
+            return yaml.safe_load(Path(kube_config_path).expanduser().read_text())
+        except FileNotFoundError:
+            pass
+    # kubectl merges multiple config files listed in KUBECONFIG
     result = subprocess.run(
-        ["kubectl", "config", "view", "-o", "json"], stdout=subprocess.PIPE
+        ["kubectl", "config", "view", "-o", "json"], capture_output=True
     )
-    payload_str = result.stdout.decode().rstrip()
-    return json.loads(payload_str)
+    return orjson.loads(result.stdout)
 
 
 @pytest.fixture(scope="session")
@@ -48,7 +60,7 @@ def cert_authority_data_pem(
     return None
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 async def kube_config(
     kube_config_cluster_payload: dict[str, Any],
     kube_config_user_payload: dict[str, Any],
@@ -73,7 +85,7 @@ class KubeClientForTest(KubeClient):
         json = {
             "kind": "Pod",
             "apiVersion": "v1",
-            "metadata": {"name": str(uuid.uuid4())},
+            "metadata": {"name": f"pod-{uuid.uuid4().hex}"},
             "spec": {
                 "automountServiceAccountToken": False,
                 "containers": [
@@ -95,8 +107,17 @@ class KubeClientForTest(KubeClient):
         yield PodRead.from_primitive(payload)
         await self._request(method="DELETE", url=f"{url}/{payload['metadata']['name']}")
 
+    async def remove_all_pvcs(self) -> int:
+        url = URL(self._pvc_url).with_query(propagationPolicy="Background")
+        payload = await self._request(method="DELETE", url=url)
+        return len(payload.get("items") or ())
 
-@pytest.fixture
+    async def remove_all_disk_namings(self) -> int:
+        payload = await self._request(method="DELETE", url=self._disk_naming_url)
+        return len(payload.get("items") or ())
+
+
+@pytest.fixture(scope="session")
 def kube_client_factory() -> Callable[[KubeConfig], KubeClientForTest]:
     def make_kube_client(kube_config: KubeConfig) -> KubeClientForTest:
         return KubeClientForTest(
@@ -116,23 +137,70 @@ def kube_client_factory() -> Callable[[KubeConfig], KubeClientForTest]:
     return make_kube_client
 
 
-@pytest.fixture
-async def kube_client(
+@pytest.fixture(scope="session")
+async def kube_client_session(
     kube_config: KubeConfig,
     kube_client_factory: Callable[[KubeConfig], KubeClientForTest],
 ) -> AsyncIterator[KubeClientForTest]:
     client = kube_client_factory(kube_config)
-
-    async def _clean_k8s(kube_client: KubeClient) -> None:
-        for pvc in await kube_client.list_pvc():
-            try:
-                await kube_client.remove_pvc(pvc.name)
-            except ResourceNotFound:
-                pass
-        for disk_naming in await kube_client.list_disk_namings():
-            await kube_client.remove_disk_naming(disk_naming.name)
-
     async with client:
-        await _clean_k8s(client)
         yield client
-        await _clean_k8s(client)
+
+
+@pytest.fixture
+async def kube_client(
+    kube_client_session: KubeClientForTest,
+) -> AsyncIterator[KubeClientForTest]:
+    client = kube_client_session
+
+    async def _wait_k8s_cleaned(kube_client: KubeClient) -> None:
+        interval_s = 0.05
+        while True:
+            pvcs, disk_namings = await asyncio.gather(
+                kube_client.list_pvc(), kube_client.list_disk_namings()
+            )
+            if not pvcs and not disk_namings:
+                return
+            await asyncio.sleep(interval_s)
+            interval_s = min(interval_s * 2, 1)
+
+    async def _clean_k8s(kube_client: KubeClientForTest) -> None:
+        removed = await asyncio.gather(
+            kube_client.remove_all_pvcs(), kube_client.remove_all_disk_namings()
+        )
+        # Nothing was there, so there is nothing to wait for
+        if any(removed):
+            await asyncio.wait_for(_wait_k8s_cleaned(kube_client), timeout=60)
+
+    await _clean_k8s(client)
+    yield client
+    await _clean_k8s(client)
+
+
+@pytest.fixture
+async def pvc_informer_factory(
+    kube_client: KubeClient,
+) -> AsyncIterator[Callable[..., Awaitable[PVCInformer]]]:
+    tasks: list[asyncio.Task[None]] = []
+
+    async def _factory(label_selector: Optional[str] = None) -> PVCInformer:
+        pvc_informer = PVCInformer(kube_client, label_selector)
+        tasks.append(asyncio.create_task(pvc_informer.run()))
+        await asyncio.wait_for(pvc_informer.wait_synced(), timeout=10)
+        return pvc_informer
+
+    yield _factory
+
+    for task in tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+@pytest.fixture
+async def pvc_informer(
+    pvc_informer_factory: Callable[..., Awaitable[PVCInformer]]
+) -> PVCInformer:
+    return await pvc_informer_factory()
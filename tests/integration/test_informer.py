@@ -0,0 +1,30 @@
+import asyncio
+from uuid import uuid4
+
+from platform_disk_api.informer import PVCInformer
+from platform_disk_api.kube_client import KubeClient, PersistentVolumeClaimWrite
+
+
+class TestPVCInformer:
+    async def test_pvc_added_and_removed(
+        self, pvc_informer: PVCInformer, kube_client: KubeClient, k8s_storage_class: str
+    ) -> None:
+        revision = pvc_informer.revision
+        pvc = await kube_client.create_pvc(
+            PersistentVolumeClaimWrite(
+                name=str(uuid4()),
+                storage_class_name=k8s_storage_class,
+                storage=10 * 1024 * 1024,  # 10 mb
+            )
+        )
+
+        async def wait_for(present: bool) -> None:
+            while (pvc_informer.get_pvc(pvc.name) is not None) != present:
+                await asyncio.sleep(0.1)
+
+        await asyncio.wait_for(wait_for(present=True), timeout=10)
+        assert pvc.name in {pvc.name for pvc in pvc_informer.pvcs}
+        assert pvc_informer.revision > revision
+
+        await kube_client.remove_pvc(pvc.name)
+        await asyncio.wait_for(wait_for(present=False), timeout=60)
@@ -238,6 +238,42 @@ class TestKubeClient:
         assert len(pvcs) == 1
         assert pvcs[0].labels == pvc.labels
 
+    async def test_list_with_label_selector(
+        self, kube_client: KubeClient, k8s_storage_class: str
+    ) -> None:
+        pvc = PersistentVolumeClaimWrite(
+            name=str(uuid4()),
+            storage_class_name=k8s_storage_class,
+            storage=10 * 1024 * 1024,  # 10 mb
+            labels=dict(foo="bar"),
+        )
+        await kube_client.create_pvc(pvc)
+        await kube_client.create_pvc(
+            PersistentVolumeClaimWrite(
+                name=str(uuid4()),
+                storage_class_name=k8s_storage_class,
+                storage=10 * 1024 * 1024,  # 10 mb
+            )
+        )
+        pvcs = await kube_client.list_pvc("foo=bar")
+        assert len(pvcs) == 1
+        assert pvcs[0].name == pvc.name
+
+    async def test_list_paginated(
+        self, kube_client: KubeClient, k8s_storage_class: str
+    ) -> None:
+        names = set()
+        for _ in range(3):
+            pvc = PersistentVolumeClaimWrite(
+                name=str(uuid4()),
+                storage_class_name=k8s_storage_class,
+                storage=10 * 1024 * 1024,  # 10 mb
+            )
+            await kube_client.create_pvc(pvc)
+            names.add(pvc.name)
+        result = await kube_client.list_pvc_result(limit=2)
+        assert {pvc.name for pvc in result.pvcs} == names
+
     async def test_create_with_annotations(
         self, kube_client: KubeClient, k8s_storage_class: str
     ) -> None:
@@ -321,6 +357,32 @@ class TestKubeClient:
 
         task.cancel()
 
+    async def test_watch_pvc(
+        self, kube_client: KubeClient, k8s_storage_class: str
+    ) -> None:
+        list_result = await kube_client.list_pvc_result()
+        seen_pvc = set()
+
+        async def watcher() -> None:
+            async for event in kube_client.watch_pvc(list_result.resource_version):
+                if event.pvc:
+                    seen_pvc.add(event.pvc.name)
+
+        task = asyncio.create_task(watcher())
+
+        pvc = await kube_client.create_pvc(
+            PersistentVolumeClaimWrite(
+                name=str(uuid4()),
+                storage_class_name=k8s_storage_class,
+                storage=10 * 1024 * 1024,  # 10 mb
+            )
+        )
+        await asyncio.sleep(0.5)
+
+        assert pvc.name in seen_pvc
+
+        task.cancel()
+
     async def test_get_stats(
         self, kube_client: KubeClientForTest, k8s_storage_class: str
     ) -> None:
@@ -1,10 +1,26 @@
+import asyncio
 from datetime import timedelta
+from typing import Optional
 
 import pytest
 
-from platform_disk_api.kube_client import KubeClient, PersistentVolumeClaimWrite
-from platform_disk_api.service import DiskNameUsed, DiskNotFound, DiskRequest, Service
-from platform_disk_api.utils import utc_now
+from platform_disk_api.informer import PVCInformer
+from platform_disk_api.kube_client import (
+    KubeClient,
+    PersistentVolumeClaimWrite,
+    ResourceInvalid,
+)
+from platform_disk_api.service import (
+    DISK_API_CREATED_AT_ANNOTATION,
+    DISK_API_DELETED_LABEL,
+    DISK_API_MARK_LABEL,
+    USER_LABEL,
+    DiskNameUsed,
+    DiskNotFound,
+    DiskRequest,
+    Service,
+)
+from platform_disk_api.utils import datetime_dump, utc_now
 
 
 class TestService:
@@ -43,9 +59,21 @@ class TestService:
         request = DiskRequest(
             storage=1024 * 1024, name="test", project_name="test-project"
         )
-        await service.create_disk(request, "testuser")
+        disk = await service.create_disk(request, "testuser")
         with pytest.raises(DiskNameUsed):
             await service.create_disk(request, "testuser")
+        disks = await service.get_all_disks()
+        assert [d.id for d in disks] == [disk.id]
+
+    async def test_create_disk_with_name_pvc_fail_removes_naming(
+        self, service: Service, kube_client: KubeClient
+    ) -> None:
+        # Zero storage is rejected by the apiserver
+        request = DiskRequest(storage=0, name="test", project_name="test-project")
+        with pytest.raises(ResourceInvalid):
+            await service.create_disk(request, "testuser")
+        assert await kube_client.list_disk_namings() == []
+        assert await service.get_all_disks() == []
 
     async def test_can_create_disk_with_same_name_after_delete(
         self, service: Service
@@ -120,6 +148,24 @@ class TestService:
         assert len(all_disks) == 1
         assert all_disks[0].id == disk_created.id
 
+    async def test_migrate_legacy_pvcs(
+        self, kube_client: KubeClient, service: Service
+    ) -> None:
+        await kube_client.create_pvc(
+            PersistentVolumeClaimWrite(
+                name="legacy-pvc",
+                storage=1024 * 1024,
+                labels={
+                    DISK_API_MARK_LABEL: "true",
+                    USER_LABEL: "testuser",
+                },
+            )
+        )
+        assert await service.migrate_legacy_pvcs() == 1
+        pvc = await kube_client.get_pvc("legacy-pvc")
+        assert DISK_API_CREATED_AT_ANNOTATION in pvc.annotations
+        assert await service.migrate_legacy_pvcs() == 0
+
     async def test_get_all_disk_in_project(
         self, kube_client: KubeClient, service: Service
     ) -> None:
@@ -136,6 +182,84 @@ class TestService:
         assert len(project_disks) == 1
         assert project_disks[0].id == disk_created.id
 
+    async def test_get_all_disks_cached_matches_uncached(
+        self,
+        kube_client: KubeClient,
+        k8s_storage_class: str,
+        service: Service,
+        pvc_informer: PVCInformer,
+    ) -> None:
+        # pvc_informer has no label selector, so outer pvcs are filtered
+        # out by the service itself
+        cached_service = Service(
+            kube_client=kube_client,
+            storage_class_name=k8s_storage_class,
+            pvc_informer=pvc_informer,
+        )
+        await kube_client.create_pvc(
+            PersistentVolumeClaimWrite(
+                name="outer-pvc", storage_class_name="no-way", storage=200
+            )
+        )
+        await kube_client.create_pvc(
+            PersistentVolumeClaimWrite(
+                name="deleted-pvc",
+                storage_class_name="no-way",
+                storage=200,
+                labels={
+                    DISK_API_MARK_LABEL: "true",
+                    DISK_API_DELETED_LABEL: "true",
+                    USER_LABEL: "testuser",
+                },
+                annotations={DISK_API_CREATED_AT_ANNOTATION: datetime_dump(utc_now())},
+            )
+        )
+        no_org_disk = await service.create_disk(
+            DiskRequest(storage=1024 * 1024, project_name="test-project"), "testuser"
+        )
+        org_disk = await service.create_disk(
+            DiskRequest(
+                storage=1024 * 1024, org_name="test-org", project_name="test-project"
+            ),
+            "testuser",
+        )
+        other_project_disk = await service.create_disk(
+            DiskRequest(
+                storage=1024 * 1024, org_name="test-org", project_name="other-project"
+            ),
+            "testuser",
+        )
+        removed_disk = await service.create_disk(
+            DiskRequest(storage=1024 * 1024, project_name="test-project"), "testuser"
+        )
+        await service.remove_disk(removed_disk.id)
+
+        async def get_ids(
+            service: Service,
+            org_name: Optional[str] = None,
+            project_name: Optional[str] = None,
+        ) -> set[str]:
+            disks = await service.get_all_disks(org_name, project_name, cached=True)
+            return {disk.id for disk in disks}
+
+        expected_ids = {no_org_disk.id, org_disk.id, other_project_disk.id}
+
+        async def wait_for_informer() -> None:
+            while await get_ids(cached_service) != expected_ids:
+                await asyncio.sleep(0.1)
+
+        await asyncio.wait_for(wait_for_informer(), timeout=60)
+
+        for org_name, project_name, ids in [
+            (None, None, expected_ids),
+            ("test-org", None, {org_disk.id, other_project_disk.id}),
+            ("no_org", None, {no_org_disk.id}),
+            (None, "test-project", {no_org_disk.id, org_disk.id}),
+            ("test-org", "other-project", {other_project_disk.id}),
+        ]:
+            assert await get_ids(cached_service, org_name, project_name) == ids
+            assert await get_ids(service, org_name, project_name) == ids
+
     async def test_life_span_stored(self, service: Service) -> None:
         life_span = timedelta(days=7)
         request = DiskRequest(
@@ -159,3 +283,21 @@ class TestService:
         await service.mark_disk_usage(disk.id, last_usage_time)
         disk = await service.get_disk(disk.id)
         assert disk.last_usage == last_usage_time
+
+    async def test_update_last_usage_bulk(self, service: Service) -> None:
+        request = DiskRequest(storage=1024 * 1024, project_name="test-project")
+        disk1 = await service.create_disk(request, "testuser")
+        disk2 = await service.create_disk(request, "testuser")
+        last_usage_time = utc_now()
+        await service.mark_disk_usage_bulk(
+            [disk1.id, disk2.id, "not-exists"], last_usage_time
+        )
+        for disk in await service.get_all_disks():
+            assert disk.last_usage == last_usage_time
+
+    async def test_update_used_bytes_bulk(self, service: Service) -> None:
+        request = DiskRequest(storage=1024 * 1024, project_name="test-project")
+        disk = await service.create_disk(request, "testuser")
+        await service.update_disk_used_bytes_bulk({disk.id: 512, "not-exists": 1})
+        disk = await service.get_disk(disk.id)
+        assert disk.used_bytes == 512
@@ -1,13 +1,19 @@
 import asyncio
-from collections.abc import AsyncIterator, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import replace
 from datetime import timedelta
 
 import pytest
 
 from platform_disk_api.config import KubeConfig
+from platform_disk_api.informer import PVCInformer
 from platform_disk_api.kube_client import KubeClient
-from platform_disk_api.service import DiskNotFound, DiskRequest, Service
+from platform_disk_api.service import (
+    DISK_PVC_LABEL_SELECTOR,
+    DiskNotFound,
+    DiskRequest,
+    Service,
+)
 from platform_disk_api.usage_watcher import (
     utc_now,
     watch_disk_usage,
@@ -53,6 +59,30 @@ class TestUsageWatcher:
         except asyncio.CancelledError:
             pass
 
+    @pytest.fixture
+    async def informer_cleanup_task(
+        self,
+        kube_client: KubeClient,
+        k8s_storage_class: str,
+        pvc_informer_factory: Callable[..., Awaitable[PVCInformer]],
+    ) -> AsyncIterator[None]:
+        pvc_informer = await pvc_informer_factory(DISK_PVC_LABEL_SELECTOR)
+        service = Service(
+            kube_client=kube_client,
+            storage_class_name=k8s_storage_class,
+            pvc_informer=pvc_informer,
+        )
+        task = asyncio.create_task(
+            watch_lifespan_ended(service, check_interval=0.1, pvc_informer=pvc_informer)
+        )
+        await asyncio.sleep(0)  # Allow task to start
+        yield
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
     async def test_usage_watcher_updates_label(
         self,
         watcher_task: None,
@@ -115,3 +145,20 @@ class TestUsageWatcher:
         await asyncio.sleep(1.33)
         with pytest.raises(DiskNotFound):
             await service.get_disk(disk.id)
+
+    async def test_task_cleanuped_no_usage_with_informer(
+        self,
+        informer_cleanup_task: None,
+        service: Service,
+    ) -> None:
+        disk = await service.create_disk(
+            DiskRequest(
+                storage=1000,
+                life_span=timedelta(seconds=1),
+                project_name="test-project",
+            ),
+            "user",
+        )
+        await asyncio.sleep(1.5)
+        with pytest.raises(DiskNotFound):
+            await service.get_disk(disk.id)
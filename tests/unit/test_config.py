@@ -74,6 +74,7 @@ def test_create_custom(cert_authority_path: str, token_path: str) -> None:
         "NP_DISK_API_K8S_CLIENT_CONN_POOL_SIZE": "333",
         "NP_DISK_API_K8S_STORAGE_CLASS": "some-class",
         "NP_DISK_API_ENABLE_DOCS": "true",
+        "NP_DISK_API_LEGACY_PVC_BACKFILL": "false",
         "NP_DISK_API_STORAGE_LIMIT_PER_USER": "444",
         "NP_CLUSTER_NAME": "default",
         "NP_CORS_ORIGINS": "https://domain1.com,http://do.main",
@@ -101,7 +102,11 @@ def test_create_custom(cert_authority_path: str, token_path: str) -> None:
             client_watch_timeout_s=555,
             client_conn_pool_size=333,
         ),
-        disk=DiskConfig(k8s_storage_class="some-class", storage_limit_per_user=444),
+        disk=DiskConfig(
+            k8s_storage_class="some-class",
+            storage_limit_per_user=444,
+            legacy_pvc_backfill=False,
+        ),
         cluster_name="default",
         cors=CORSConfig(["https://domain1.com", "http://do.main"]),
         enable_docs=True,
@@ -120,6 +125,7 @@ def test_create_disk_usage_watcher() -> None:
         "NP_ZIPKIN_URL": "https://zipkin:9411",
         "NP_SENTRY_DSN": "https://sentry",
         "NP_SENTRY_CLUSTER_NAME": "test",
+        "NP_DISK_API_POD_LABEL_SELECTOR": "has-pvc=true",
     }
     config = EnvironConfigFactory(environ).create_disk_usage_watcher()
     assert config == DiskUsageWatcherConfig(
@@ -133,6 +139,7 @@ def test_create_disk_usage_watcher() -> None:
             app_name="platform-disks-usage-watcher",
             cluster_name="test",
         ),
+        pod_label_selector="has-pvc=true",
     )
 
 
@@ -0,0 +1,47 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any, cast
+
+from platform_disk_api.informer import PVCInformer
+from platform_disk_api.kube_client import (
+    KubeClient,
+    KubeClientException,
+    PersistentVolumeClaimListResult,
+    PersistentVolumeClaimWatchEvent,
+)
+
+
+class _FailingKubeClient:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.list_calls = 0
+
+    async def list_pvc_result(self, *args: Any) -> PersistentVolumeClaimListResult:
+        self.list_calls += 1
+        if self.list_calls <= self.failures:
+            raise KubeClientException("boom")
+        return PersistentVolumeClaimListResult(resource_version="1", pvcs=[])
+
+    async def watch_pvc(
+        self, *args: Any
+    ) -> AsyncIterator[PersistentVolumeClaimWatchEvent]:
+        await asyncio.sleep(3600)
+        yield  # type: ignore
+
+
+class TestPVCInformer:
+    async def test_retries_with_backoff(self) -> None:
+        kube_client = _FailingKubeClient(failures=3)
+        informer = PVCInformer(
+            cast(KubeClient, kube_client),
+            min_retry_interval_s=0.01,
+            max_retry_interval_s=0.02,
+        )
+        task = asyncio.create_task(informer.run())
+        await asyncio.wait_for(informer.wait_synced(), timeout=1)
+        assert kube_client.list_calls == 4
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
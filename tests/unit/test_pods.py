@@ -2,6 +2,7 @@ from typing import Any
 
 import pytest
 
+from platform_disk_api.informer import PodPVCIndex
 from platform_disk_api.kube_client import PodListResult, PodRead, PodWatchEvent
 
 
@@ -38,6 +39,14 @@ class TestPodSerialization:
 
         assert set(pod.pvc_in_use) == set(pvc_names)
 
+    def test_pod_from_primitive_scheduled(self) -> None:
+        payload = self._make_pod_payload(["pvc1"])
+        payload["spec"]["nodeName"] = "node1"
+        pod = PodRead.from_primitive(payload)
+
+        assert pod.name == "boo"
+        assert pod.node_name == "node1"
+
     @pytest.mark.parametrize(
         "resource_version,pvc_names", [("ver1", ("pvc1", "pvc2", "pvc3"))]
     )
@@ -68,6 +77,13 @@ class TestPodSerialization:
         assert set(event.pod.pvc_in_use) == set(pvc_names)
         assert event.type == PodWatchEvent.Type.ADDED
 
+    def test_pod_watch_event_keeps_resource_version(self) -> None:
+        payload = self._make_pod_payload([])
+        payload["metadata"]["resourceVersion"] = "ver1"
+        event = PodWatchEvent.from_primitive({"type": "MODIFIED", "object": payload})
+
+        assert event.resource_version == "ver1"
+
     @pytest.mark.parametrize("resource_version", ["ver2"])
     def test_pod_watch_bookmark_event_from_primitive(
         self,
@@ -86,3 +102,34 @@ class TestPodSerialization:
 
         assert event.type == PodWatchEvent.Type.BOOKMARK
         assert event.resource_version == resource_version
+
+
+class TestPodPVCIndex:
+    def test_node_names_before_sync(self) -> None:
+        assert PodPVCIndex().node_names is None
+
+    def test_node_names(self) -> None:
+        index = PodPVCIndex()
+        index.reset(
+            [
+                PodRead(["pvc1"], name="pod1", node_name="node1"),
+                PodRead([], name="pod2", node_name="node2"),
+            ]
+        )
+        assert index.node_names == {"node1"}
+
+        index.handle_event(
+            PodWatchEvent(
+                type=PodWatchEvent.Type.ADDED,
+                pod=PodRead(["pvc2"], name="pod3", node_name="node3"),
+            )
+        )
+        assert index.node_names == {"node1", "node3"}
+
+        index.handle_event(
+            PodWatchEvent(
+                type=PodWatchEvent.Type.DELETED,
+                pod=PodRead(["pvc1"], name="pod1", node_name="node1"),
+            )
+        )
+        assert index.node_names == {"node3"}
@@ -2,6 +2,7 @@ import pytest
 
 from platform_disk_api.kube_client import (
     PersistentVolumeClaimRead,
+    PersistentVolumeClaimWatchEvent,
     PersistentVolumeClaimWrite,
 )
 
@@ -216,3 +217,61 @@ class TestPVCSerialization:
             labels=dict(),
             annotations=dict(foo="bar"),
         )
+
+    def test_pvc_from_primitive_terminating(self) -> None:
+        pvc = PersistentVolumeClaimRead.from_primitive(
+            {
+                "apiVersion": "v1",
+                "kind": "PersistentVolumeClaim",
+                "metadata": {
+                    "name": "test",
+                    "deletionTimestamp": "2023-01-01T00:00:00Z",
+                },
+                "spec": {
+                    "accessModes": ["ReadWriteOnce"],
+                    "volumeMode": "Filesystem",
+                    "resources": {"requests": {"storage": 100}},
+                    "storageClassName": "test-stor",
+                },
+                "status": {"phase": "Bound", "capacity": {"storage": 100}},
+            }
+        )
+        assert pvc.is_terminating
+
+    def test_pvc_watch_event_from_primitive(self) -> None:
+        event = PersistentVolumeClaimWatchEvent.from_primitive(
+            {
+                "type": "MODIFIED",
+                "object": {
+                    "apiVersion": "v1",
+                    "kind": "PersistentVolumeClaim",
+                    "metadata": {"name": "test", "resourceVersion": "ver1"},
+                    "spec": {
+                        "accessModes": ["ReadWriteOnce"],
+                        "volumeMode": "Filesystem",
+                        "resources": {"requests": {"storage": 100}},
+                        "storageClassName": "test-stor",
+                    },
+                    "status": {"phase": "Pending"},
+                },
+            }
+        )
+        assert event.type == PersistentVolumeClaimWatchEvent.Type.MODIFIED
+        assert event.resource_version == "ver1"
+        assert event.pvc
+        assert event.pvc.name == "test"
+
+    def test_pvc_watch_bookmark_event_from_primitive(self) -> None:
+        event = PersistentVolumeClaimWatchEvent.from_primitive(
+            {
+                "type": "BOOKMARK",
+                "object": {
+                    "apiVersion": "v1",
+                    "kind": "PersistentVolumeClaim",
+                    "metadata": {"resourceVersion": "ver2"},
+                },
+            }
+        )
+        assert event.type == PersistentVolumeClaimWatchEvent.Type.BOOKMARK
+        assert event.resource_version == "ver2"
+        assert event.pvc is None
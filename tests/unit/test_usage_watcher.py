@@ -0,0 +1,85 @@
+import asyncio
+from collections.abc import Collection
+from datetime import datetime
+from typing import cast
+
+from platform_disk_api.service import Service
+from platform_disk_api.usage_watcher import _flush_last_used
+
+
+class _RecordingService:
+    def __init__(self, delay: float = 0, fail: bool = False) -> None:
+        self.calls: list[set[str]] = []
+        self.delay = delay
+        self.fail = fail
+
+    async def mark_disk_usage_bulk(
+        self, disk_ids: Collection[str], time: datetime
+    ) -> None:
+        self.calls.append(set(disk_ids))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise Exception("Failed")
+
+
+class TestFlushLastUsed:
+    async def test_pending_coalesced(self) -> None:
+        service = _RecordingService()
+        pending = {"disk-1", "disk-2"}
+        task = asyncio.create_task(
+            _flush_last_used(cast(Service, service), pending, flush_interval=0.1)
+        )
+        await asyncio.sleep(0)
+        pending.update({"disk-2", "disk-3"})
+        await asyncio.sleep(0.15)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert service.calls == [{"disk-1", "disk-2", "disk-3"}]
+        assert pending == set()
+
+    async def test_nothing_pending(self) -> None:
+        service = _RecordingService()
+        task = asyncio.create_task(
+            _flush_last_used(cast(Service, service), set(), flush_interval=0.01)
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert service.calls == []
+
+    async def test_interrupted_flush_kept_pending(self) -> None:
+        service = _RecordingService(delay=10)
+        pending = {"disk-1"}
+        task = asyncio.create_task(
+            _flush_last_used(cast(Service, service), pending, flush_interval=0.01)
+        )
+        await asyncio.sleep(0.05)
+        assert service.calls == [{"disk-1"}]
+        assert pending == set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert pending == {"disk-1"}
+
+    async def test_failed_flush_retried(self) -> None:
+        service = _RecordingService(fail=True)
+        pending = {"disk-1"}
+        task = asyncio.create_task(
+            _flush_last_used(cast(Service, service), pending, flush_interval=0.01)
+        )
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert len(service.calls) > 1
+        assert pending == {"disk-1"}